@@ -5,12 +5,18 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.button import Button
 from kivy.properties import StringProperty, NumericProperty
 
-import numpy as np
-import sounddevice as sd
+import logging
+import numbers
 import threading # For non-blocking sound
+import queue
+from functools import lru_cache
+
+# Goes through logging instead of print so routine messages cost nothing unless enabled
+log = logging.getLogger(__name__)
 
 # Note Data Structures
-# Frequencies for C4, C#4, D4
+# 'frequency' is informational only: playback uses FREQ_LUT below, which derives
+# every note and octave from A4
 NOTES = {
     'o': {'name': 'F#/Gb (Rose)', 'base_rgb': (1.0, 0.4, 0.7), 'frequency': None}, # F#4: 369.99 Hz
     'p': {'name': 'G (Red)', 'base_rgb': (1.0, 0.0, 0.0), 'frequency': None},       # G4:  392.00 Hz
@@ -26,6 +32,11 @@ NOTES = {
     'n': {'name': 'F (Violet)', 'base_rgb': (0.5, 0.0, 1.0), 'frequency': None}     # F4:  349.23 Hz
 }
 
+# Structure-of-arrays view of NOTES: row i of each table belongs to NOTE_KEYS[i]
+NOTE_KEYS = ''.join(NOTES)
+NOTE_IDX = {letter: i for i, letter in enumerate(NOTE_KEYS)}
+NOTE_BASE_RGB = tuple(NOTES[letter]['base_rgb'] for letter in NOTE_KEYS)
+
 # Audio settings
 SAMPLE_RATE = 44100  # samples per second
 DEFAULT_VOLUME = 0.5
@@ -34,15 +45,37 @@ MIN_OCTAVE = 0
 MAX_OCTAVE = 8
 MIDDLE_OCTAVE = 4
 
+# Equal-temperament frequency of every note: FREQ_LUT[NOTE_IDX[letter]][octave - MIN_OCTAVE]
+A4_FREQUENCY = 440.0
+_SEMITONES_ABOVE_C = [(i - NOTE_IDX['i']) % 12 for i in range(len(NOTE_KEYS))]
+_A_SEMITONES_ABOVE_C = _SEMITONES_ABOVE_C[NOTE_IDX['r']]
+FREQ_LUT = tuple(
+    tuple(A4_FREQUENCY * 2.0 ** ((semitones - _A_SEMITONES_ABOVE_C) / 12.0 + octave - MIDDLE_OCTAVE)
+          for octave in range(MIN_OCTAVE, MAX_OCTAVE + 1))
+    for semitones in _SEMITONES_ABOVE_C)
+
+# Rendered buffers waiting to be written to the app's output stream by the audio worker.
+# Bounded so rapid presses can't build up a backlog of notes.
+AUDIO_QUEUE_SIZE = 4
+_audio_queue = queue.Queue(maxsize=AUDIO_QUEUE_SIZE)
+# Set by the audio worker when it can't start; playback then reports an error instead
+_audio_unavailable = threading.Event()
+
+
+def _clamp01(x):
+    # Plain comparisons on Python floats; the color path doesn't need numpy
+    return 0.0 if x < 0.0 else 1.0 if x > 1.0 else x
+
+
 # Ensure get_note_color returns values clamped between 0 and 1 for RGB
-def get_note_color(note_letter, octave):
+def _compute_note_color(note_letter, octave):
     """
     Calculates the color for a given note and octave.
     """
-    if note_letter not in NOTES:
-        raise ValueError(f"Unknown note letter: {note_letter}")
-
-    base_rgb = NOTES[note_letter]['base_rgb']
+    try:
+        base_rgb = NOTE_BASE_RGB[NOTE_IDX[note_letter]]
+    except KeyError:
+        raise ValueError(f"Unknown note letter: {note_letter}") from None
 
     # Clamp octave to min/max and determine lightness factor
     if octave < MIN_OCTAVE:
@@ -50,54 +83,60 @@ def get_note_color(note_letter, octave):
     if octave > MAX_OCTAVE:
         return (1.0, 1.0, 1.0)  # White
 
-    r, g, b = base_rgb
-
     if octave == MIDDLE_OCTAVE:
         return base_rgb
-    elif octave < MIDDLE_OCTAVE:
-        # Darken: scale towards 0
-        # factor should be 0 for MIN_OCTAVE and approach 1 for MIDDLE_OCTAVE -1
-        # Example: if MIN_OCTAVE=0, MIDDLE_OCTAVE=4
-        # octave 0 -> factor = 0/4 = 0
-        # octave 1 -> factor = 1/4 = 0.25
-        # octave 2 -> factor = 2/4 = 0.5
-        # octave 3 -> factor = 3/4 = 0.75
-        # We want to scale by a factor that represents how close to MIDDLE_OCTAVE we are
-        darken_factor = octave / float(MIDDLE_OCTAVE - MIN_OCTAVE) if MIDDLE_OCTAVE != MIN_OCTAVE else 1.0
-        # Ensure factor is within a reasonable range, especially if MIN_OCTAVE is not 0
-        # This calculation might need refinement, the original was (octave / 4.0)
-        # Let's use a simpler approach for now:
-        # Scale from MIN_OCTAVE to MIDDLE_OCTAVE
-        # The closer to MIN_OCTAVE, the darker.
-        # The closer to MIDDLE_OCTAVE, the more it's the base_rgb.
-        # A simple linear interpolation:
-        # lightness_factor = (octave - MIN_OCTAVE) / float(MIDDLE_OCTAVE - MIN_OCTAVE)
-        # For octave < MIDDLE_OCTAVE, we want to scale the color down
-        # A more direct scaling:
-        # factor = (octave - MIN_OCTAVE + 1) / float(MIDDLE_OCTAVE - MIN_OCTAVE + 1)
-        # if octave = 0, factor = 1/5; octave = 3, factor = 4/5
-        # The original (octave / 4.0) assumed MIDDLE_OCTAVE is 4 and MIN_OCTAVE is 0
-        # Let's stick to the spirit of the original simplified instruction:
-        # If octave < 4, darken the color (e.g., lightened_rgb = base_rgb * (octave / 4.0))
-        # This will make octave 0 black, which is fine.
-        # However, it might make octaves 1,2,3 too dark.
-        # Let's try: scale = (octave - MIN_OCTAVE) / (MIDDLE_OCTAVE - MIN_OCTAVE)
-        # Octave 0 (Min) -> 0.0
-        # Octave 1 -> 0.25
-        # Octave 2 -> 0.5
-        # Octave 3 -> 0.75
-        # Octave 4 (Mid) -> 1.0 (handled by base_rgb)
-        scale_factor = (float(octave) / MIDDLE_OCTAVE) if MIDDLE_OCTAVE > 0 else 0
-        r_calc = r * scale_factor
-        g_calc = g * scale_factor
-        b_calc = b * scale_factor
-        return (np.clip(r_calc, 0, 1), np.clip(g_calc, 0, 1), np.clip(b_calc, 0, 1))
+
+    # Both directions are a straight blend of base_rgb towards a target color:
+    # below the middle octave towards black, above it towards white.
+    if octave < MIDDLE_OCTAVE:
+        # Darken: octave 0 -> black, 1 -> 25%, 2 -> 50%, 3 -> 75% of base_rgb
+        target = 0.0
+        amount = (1.0 - float(octave) / MIDDLE_OCTAVE) if MIDDLE_OCTAVE > 0 else 1.0
     else: # octave > MIDDLE_OCTAVE
-        lighten_factor = (float(octave - MIDDLE_OCTAVE) / (MAX_OCTAVE - MIDDLE_OCTAVE)) if MAX_OCTAVE != MIDDLE_OCTAVE else 0
-        r_calc = r + (1.0 - r) * lighten_factor
-        g_calc = g + (1.0 - g) * lighten_factor
-        b_calc = b + (1.0 - b) * lighten_factor
-        return (np.clip(r_calc, 0, 1), np.clip(g_calc, 0, 1), np.clip(b_calc, 0, 1))
+        target = 1.0
+        amount = (float(octave - MIDDLE_OCTAVE) / (MAX_OCTAVE - MIDDLE_OCTAVE)) if MAX_OCTAVE != MIDDLE_OCTAVE else 0
+    return tuple(_clamp01(c + (target - c) * amount) for c in base_rgb)
+
+
+# Every (note, octave) color is known up front, so compute them all once at import.
+# Flat and immutable: each note gets a row for octaves MIN_OCTAVE - 1 .. MAX_OCTAVE + 1,
+# whose two end entries are the black/white used for any out-of-range octave.
+_COLOR_ROW = MAX_OCTAVE - MIN_OCTAVE + 3
+_COLOR_TABLE = tuple(_compute_note_color(note_letter, octave)
+                     for note_letter in NOTE_KEYS
+                     for octave in range(MIN_OCTAVE - 1, MAX_OCTAVE + 2))
+
+
+def _whole_octave(octave):
+    # Returns the octave as an int when it is a whole number (4.0 -> 4), else None.
+    # Raises ValueError for anything that isn't a real number.
+    if isinstance(octave, int):
+        return octave
+    if not isinstance(octave, numbers.Real):
+        raise ValueError(f"Octave must be a number: {octave!r}")
+    return int(octave) if float(octave).is_integer() else None
+
+
+# Memoized on top of the table so repeat lookups, including out-of-range octaves,
+# skip the Python call entirely.
+@lru_cache(maxsize=256)
+def get_note_color(note_letter, octave):
+    """
+    Returns the color for a given note and octave from the precomputed table.
+    """
+    try:
+        note_idx = NOTE_IDX[note_letter]
+    except KeyError:
+        raise ValueError(f"Unknown note letter: {note_letter}") from None
+    whole_octave = _whole_octave(octave)
+    if whole_octave is None:
+        # Fractional octaves fall between table entries, so compute them directly
+        return _compute_note_color(note_letter, octave)
+    octave = whole_octave
+
+    # Clamp onto the black/white entries at either end of the row
+    octave = min(MAX_OCTAVE + 1, max(MIN_OCTAVE - 1, octave))
+    return _COLOR_TABLE[note_idx * _COLOR_ROW + octave - (MIN_OCTAVE - 1)]
 
 
 class ColorDisplayWidget(Widget):
@@ -118,14 +157,31 @@ class ColorDisplayWidget(Widget):
 
     def set_color(self, rgb_tuple):
         self.display_color_rgb = rgb_tuple
-        # Update the color instruction directly
+        # Update the color instruction directly; the Rectangle stays as it is,
+        # so the canvas doesn't need to be cleared and rebuilt.
         self.color_instruction.rgb = self.display_color_rgb
-        # No need to clear and re-add if we just update the Color instruction's rgb property.
-        # However, the suggestion was to clear and re-add, let's follow that to be safe.
-        self.canvas.before.clear()
-        with self.canvas.before:
-            self.color_instruction = Color(*self.display_color_rgb, 1) # alpha = 1
-            self.rect = Rectangle(size=self.size, pos=self.pos)
+
+
+def _note_frequency(note_letter, octave):
+    # Shared lookup for play_note_sound and play_chord; logs and returns None for bad input
+    try:
+        note_idx = NOTE_IDX[note_letter]
+    except KeyError:
+        log.error("Frequency not defined for note letter: %s", note_letter)
+        return None
+    try:
+        whole_octave = _whole_octave(octave)
+    except ValueError as e:
+        log.error("%s", e)
+        return None
+    if whole_octave is None:
+        log.error("Octave must be a whole number: %s", octave)
+        return None
+    octave = whole_octave
+    if not MIN_OCTAVE <= octave <= MAX_OCTAVE:
+        log.error("Octave out of range: %s", octave)
+        return None
+    return FREQ_LUT[note_idx][octave - MIN_OCTAVE]
 
 
 def play_note_sound(note_letter, duration_ms=500, octave=4):
@@ -133,38 +189,41 @@ def play_note_sound(note_letter, duration_ms=500, octave=4):
     Generates and plays a sine wave for the given note and duration.
     Octave affects frequency.
     """
-    if note_letter not in NOTES or NOTES[note_letter].get('frequency') is None:
-        print(f"Error: Frequency not defined for note letter: {note_letter}")
+    if _audio_unavailable.is_set():
+        log.error("Audio output unavailable, not playing: %s%s", note_letter, octave)
+        return
+    frequency = _note_frequency(note_letter, octave)
+    if frequency is None:
         return
+    _queue_sound(_synth().render_tone(frequency, duration_ms, SAMPLE_RATE, DEFAULT_VOLUME))
+
+
+def play_chord(notes, duration_ms=500):
+    """
+    Plays several notes at once. notes is a sequence of (note_letter, octave) pairs.
+    """
+    if _audio_unavailable.is_set():
+        log.error("Audio output unavailable, not playing chord: %s", notes)
+        return
+    frequencies = [_note_frequency(note_letter, octave) for note_letter, octave in notes]
+    if not frequencies or None in frequencies:
+        return
+    _queue_sound(_synth().render_chord(frequencies, duration_ms, SAMPLE_RATE, DEFAULT_VOLUME))
+
+
+def _synth():
+    # Imported on first use so numpy loads off the UI startup path
+    import synth
+    return synth
 
-    base_frequency = NOTES[note_letter]['frequency']
-    
-    # Adjust frequency based on octave. Each octave doubles/halves frequency.
-    # C4 is middle C. Octave 4 is the base frequency.
-    frequency = base_frequency * (2 ** (octave - 4))
-
-    duration_s = duration_ms / 1000.0
-    t = np.linspace(0, duration_s, int(SAMPLE_RATE * duration_s), False)
-    wave = np.sin(frequency * t * 2 * np.pi)
-
-    # Normalize to 16-bit range if using certain sounddevice configurations,
-    # but for float32 (default for sounddevice), it should be in [-1.0, 1.0].
-    # wave = wave * (2**15 - 1) / np.max(np.abs(wave)) # For int16
-    # wave = wave.astype(np.int16)
-
-    # Apply volume
-    wave *= DEFAULT_VOLUME
-    
-    # Play sound in a separate thread to avoid blocking Kivy UI
-    def play_sound():
-        try:
-            sd.play(wave, SAMPLE_RATE)
-            sd.wait()  # Wait until sound has finished playing
-        except Exception as e:
-            print(f"Error playing sound: {e}")
 
-    sound_thread = threading.Thread(target=play_sound)
-    sound_thread.start()
+def _queue_sound(wave):
+    # Hand off to the audio worker, which writes to the open output stream so the Kivy UI never blocks.
+    # If playback has fallen behind, drop the sound instead of waiting.
+    try:
+        _audio_queue.put_nowait(wave)
+    except queue.Full:
+        log.debug("Sound queue full, dropping sound")
 
 
 class NoteColorsApp(App):
@@ -172,6 +231,10 @@ class NoteColorsApp(App):
     current_octave = NumericProperty(4)
 
     def build(self):
+        # Audio backend loads and opens its stream on the worker thread, while the window shows
+        self._audio_thread = threading.Thread(target=self._audio_worker, daemon=True)
+        self._audio_thread.start()
+
         # Main layout
         layout = BoxLayout(orientation='vertical')
 
@@ -201,13 +264,49 @@ class NoteColorsApp(App):
 
         return layout
 
+    def on_stop(self):
+        # Discard pending sounds so the exit signal can't block on a full queue
+        try:
+            while True:
+                _audio_queue.get_nowait()
+        except queue.Empty:
+            pass
+        _audio_queue.put(None) # Tell the audio worker to exit; it closes the stream
+        self._audio_thread.join(timeout=1.0)
+
+    def _audio_worker(self):
+        # Runs on its own thread. Importing synth (numpy, the compiled tone kernel) and
+        # sounddevice (PortAudio) is slow, so it is kept off the UI thread along with
+        # opening the stream.
+        try:
+            import synth
+            import sounddevice as sd
+            # Keep one output stream open for the app's lifetime instead of opening one per note
+            stream = sd.OutputStream(samplerate=SAMPLE_RATE, channels=1, dtype='float32',
+                                     blocksize=256, latency='low')
+        except Exception as e:
+            log.error("Error opening audio stream: %s", e)
+            _audio_unavailable.set() # Presses now log an error instead of rendering on the UI thread
+            return
+
+        with stream: # Started here, stopped and closed on exit
+            # Play queued buffers one after another
+            while True:
+                wave = _audio_queue.get()
+                if wave is None:
+                    break
+                try:
+                    stream.write(wave)
+                except Exception as e:
+                    log.error("Error playing sound: %s", e)
+
     def update_displayed_color(self, *args):
         try:
             new_color = get_note_color(self.current_note_letter, self.current_octave)
             if self.color_display:
                 self.color_display.set_color(new_color)
         except ValueError as e:
-            print(f"Error getting color for display: {e}")
+            log.error("Error getting color for display: %s", e)
             if self.color_display:
                 self.color_display.set_color((0.1, 0.1, 0.1)) # Dark gray for error
 
@@ -216,10 +315,10 @@ class NoteColorsApp(App):
         self.current_note_letter = 'i' # B#/C (Chartreuse) - C4
         self.current_octave = 4
         self.update_displayed_color()
-        print(f"Set note to Middle C: {self.current_note_letter}{self.current_octave}")
+        log.debug("Set note to Middle C: %s%s", self.current_note_letter, self.current_octave)
 
     def play_current_note_sound_action(self, instance):
-        print(f"Playing sound for: {self.current_note_letter}{self.current_octave}")
+        log.debug("Playing sound for: %s%s", self.current_note_letter, self.current_octave)
         play_note_sound(self.current_note_letter, duration_ms=500, octave=self.current_octave)
 
 if __name__ == '__main__':
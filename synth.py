@@ -0,0 +1,132 @@
+"""
+Sine-wave synthesis for note playback.
+
+Kept separate from main.py so numpy isn't imported while the Kivy window is starting
+up; the audio worker thread imports this module once the app is built.
+"""
+import math
+import numpy as np
+import threading
+from functools import lru_cache
+
+try:
+    from numba import njit
+except ImportError: # Optional: not available on every platform (e.g. mobile builds)
+    njit = None
+
+# One period of a sine wave; notes are synthesized by stepping through it.
+SINE_TABLE_SIZE = 1024  # must be a power of two
+_SINE_LUT = np.sin(np.linspace(0, 2 * np.pi, SINE_TABLE_SIZE, endpoint=False)).astype(np.float32)
+
+# Fade notes in and out over ENVELOPE_RAMP samples so they don't click at the edges
+ENVELOPE_RAMP = 512
+
+# Phases are Q32 fixed point (a full period is 2**32), so the top bits index the table
+_PHASE_SHIFT = 32 - (SINE_TABLE_SIZE.bit_length() - 1)
+
+if njit is not None:
+    # The explicit signature makes Numba compile when this module is imported (on the audio
+    # worker thread) rather than on the first render, which would stall the UI thread.
+    @njit('float32[:](float64, int64, int64, float64)', cache=True)
+    def _goertzel_sine(frequency, n_samples, sample_rate, volume):
+        # Two-tap oscillator y[n] = 2*cos(w)*y[n-1] - y[n-2], seeded with sin(-w) and sin(-2w):
+        # one multiply and one subtract per sample instead of a sin call.
+        # The state stays in float64 so the amplitude doesn't drift over long notes.
+        out = np.empty(n_samples, np.float32)
+        w = 2.0 * math.pi * frequency / sample_rate
+        coef = 2.0 * math.cos(w)
+        y1 = math.sin(-w)
+        y2 = math.sin(-2.0 * w)
+        for i in range(n_samples):
+            y = coef * y1 - y2
+            out[i] = y * volume
+            y2 = y1
+            y1 = y
+        return out
+
+    _sine = _goertzel_sine
+else:
+    # Scratch space for table indices, reused by every render so synthesis doesn't allocate
+    # temporaries. Covers notes up to 2 seconds at 44.1 kHz; guarded by _scratch_lock.
+    # Only the wavetable path needs it, so it isn't allocated when Numba is available.
+    _SCRATCH_SAMPLES = 2 * 44100
+    _SAMPLE_INDEX = np.arange(_SCRATCH_SAMPLES, dtype=np.uint32)
+    _phase_scratch = np.empty(_SCRATCH_SAMPLES, dtype=np.uint32)
+    _scratch_lock = threading.Lock()
+
+    def _table_sine(frequency, n_samples, sample_rate, volume):
+        # Index into the sine table instead of calling np.sin per sample.
+        # float32 is sounddevice's default, so the buffer is played without conversion.
+        # uint32 arithmetic wraps at 2**32, which is exactly one period
+        phase_inc = np.uint32(int(frequency * (1 << 32) / sample_rate))
+        with _scratch_lock:
+            if n_samples <= _SCRATCH_SAMPLES:
+                phases = _phase_scratch[:n_samples]
+                np.multiply(_SAMPLE_INDEX[:n_samples], phase_inc, out=phases)
+            else:
+                # Longer than the scratch space: allocate for this note only
+                phases = np.arange(n_samples, dtype=np.uint32)
+                phases *= phase_inc
+            phases >>= _PHASE_SHIFT
+            wave = _SINE_LUT[phases]  # fancy indexing returns a fresh C-contiguous array
+
+        # Apply volume
+        wave *= np.float32(volume)
+        return wave
+
+    _sine = _table_sine
+
+
+# lru_cache is safe to call from any thread; the returned buffers are read-only
+# so they can be shared between plays.
+@lru_cache(maxsize=128)
+def render_tone(frequency, duration_ms, sample_rate, volume):
+    """
+    Renders a float32 sine wave of the given frequency and duration.
+    """
+    duration_s = duration_ms / 1000.0
+    n_samples = int(sample_rate * duration_s)
+    wave = _sine(frequency, n_samples, sample_rate, volume)
+    _apply_envelope(wave)
+
+    wave.flags.writeable = False
+    return wave
+
+
+def render_chord(frequencies, duration_ms, sample_rate, volume):
+    """
+    Renders several sine waves mixed into one float32 buffer.
+    All notes are computed together in one broadcast np.sin call.
+    """
+    n_samples = int(sample_rate * duration_ms / 1000.0)
+    if len(frequencies) == 0:
+        return np.zeros(n_samples, dtype=np.float32)
+
+    # Phases are built in float64 so high notes don't drift over long chords;
+    # only the mixed result is cast to float32.
+    freqs = np.asarray(frequencies, dtype=np.float64)
+    t = np.arange(n_samples, dtype=np.float64) / sample_rate
+    phases = (2 * np.pi) * freqs[:, None] * t[None, :]
+    wave = np.sin(phases, out=phases).sum(axis=0).astype(np.float32)
+
+    # Split the volume between the notes so the mix stays in [-1.0, 1.0]
+    wave *= np.float32(volume / len(freqs))
+    _apply_envelope(wave)
+    return wave
+
+
+@lru_cache(maxsize=16)
+def _envelope(ramp):
+    # Attack and release halves of a Hann window, built once per ramp length
+    window = np.hanning(2 * ramp).astype(np.float32)
+    window.flags.writeable = False
+    return window[:ramp], window[ramp:]
+
+
+def _apply_envelope(wave):
+    # Apply the fade in/out envelope in place; buffers too short for the full ramp get a shorter one
+    ramp = min(ENVELOPE_RAMP, len(wave) // 2)
+    if ramp > 0:
+        attack, release = _envelope(ramp)
+        wave[:ramp] *= attack
+        wave[-ramp:] *= release